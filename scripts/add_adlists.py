@@ -6,6 +6,7 @@ import sqlite3
 import subprocess
 import sys
 import tempfile
+import time
 from typing import List, Tuple
 
 # === Your chosen lists (no malware/crypto) ===
@@ -41,13 +42,29 @@ def container_has_sqlite3(container: str) -> bool:
     )
     return res.returncode == 0
 
+def container_has_python3(container: str) -> bool:
+    # returns True if python3 exists in container
+    res = subprocess.run(
+        ["docker", "exec", container, "bash", "-lc", "command -v python3 >/dev/null 2>&1"],
+        check=False,
+    )
+    return res.returncode == 0
+
 def exec_sql_in_container(container: str, sql: str):
+    # One transaction for the whole batch instead of one implicit (fsync'd)
+    # transaction per statement. journal_mode is left alone: it is persisted
+    # in gravity.db and FTL has the live file open.
+    sql = f"PRAGMA synchronous=NORMAL;\nBEGIN IMMEDIATE;\n{sql}\nCOMMIT;\n"
     cmd = [
         "docker", "exec", "-i", container, "bash", "-lc",
         f"sqlite3 {shlex.quote(DB_PATH_IN_CONTAINER)} <<'SQL'\n{sql}\nSQL"
     ]
     run(cmd)
 
+def sql_quote(value: str) -> str:
+    # the sqlite3 CLI and executescript() have no bind parameters
+    return "'" + value.replace("'", "''") + "'"
+
 def ensure_default_group_sql() -> str:
     return f"""
 INSERT OR IGNORE INTO "group"(id, enabled, name, description)
@@ -55,27 +72,47 @@ VALUES ({DEFAULT_GROUP_ID}, 1, 'Default', 'Auto-created');
 UPDATE "group" SET enabled=1 WHERE id={DEFAULT_GROUP_ID};
 """
 
-def upsert_adlist_sql(url: str, comment: str) -> str:
-    u = url.replace("'", "''")
-    c = comment.replace("'", "''")
+def upsert_adlist_sql(url: str, comment: str, now: int) -> str:
     return f"""
-INSERT OR IGNORE INTO adlist(address, enabled, date_added, date_modified, comment)
-VALUES ('{u}', 1, strftime('%s','now'), strftime('%s','now'), '{c}');
-UPDATE adlist
+INSERT INTO adlist(address, enabled, date_added, date_modified, comment)
+VALUES ({sql_quote(url)}, 1, {now}, {now}, {sql_quote(comment)})
+ON CONFLICT(address) DO UPDATE
    SET enabled=1,
-       date_modified=strftime('%s','now'),
-       comment='{c}'
- WHERE address='{u}';
+       date_modified=excluded.date_modified,
+       comment=excluded.comment;
+"""
+
+def link_adlists_sql(urls: List[str]) -> str:
+    # one statement links every adlist to the default group
+    addresses = ", ".join(sql_quote(u) for u in urls)
+    return f"""
 INSERT OR IGNORE INTO adlist_by_group(adlist_id, group_id)
-SELECT id, {DEFAULT_GROUP_ID} FROM adlist WHERE address='{u}';
+SELECT id, {DEFAULT_GROUP_ID} FROM adlist WHERE address IN ({addresses});
 """
 
-def edit_db_on_host(db_path: str):
+def adlists_sql(adlists: List[Tuple[str, str]], urls: List[str], now: int) -> str:
+    # full edit script: default group, upsert each of adlists, link every url
+    sql = ensure_default_group_sql()
+    for url, desc in adlists:
+        sql += "\n" + upsert_adlist_sql(url, desc, now)
+    sql += "\n" + link_adlists_sql(urls)
+    return sql
+
+def edit_db_on_host(db_path: str) -> bool:
+    """Returns True if the DB was modified, False if it was already up to date."""
     if not os.path.exists(db_path):
         raise SystemExit(f"DB file not found at {db_path}")
 
     conn = sqlite3.connect(db_path)
     try:
+        # This is a throwaway copy that gets docker-cp'd back, so skip fsyncs.
+        # Keep the journal in memory rather than WAL so the journal mode
+        # stored in the file header is unchanged when it lands in the container.
+        conn.execute("PRAGMA journal_mode=MEMORY")
+        conn.execute("PRAGMA synchronous=OFF")
+        conn.execute("PRAGMA temp_store=MEMORY")
+        conn.execute("PRAGMA cache_size=-20000")
+
         cur = conn.cursor()
         # sanity check tables
         cur.execute("SELECT name FROM sqlite_master WHERE type='table'")
@@ -85,42 +122,57 @@ def edit_db_on_host(db_path: str):
         if miss:
             raise SystemExit(f"Unexpected DB schema; missing tables: {', '.join(sorted(miss))}")
 
-        # ensure default group
-        cur.execute('INSERT OR IGNORE INTO "group"(id, enabled, name, description) VALUES (?, 1, ?, ?)',
-                    (DEFAULT_GROUP_ID, "Default", "Auto-created"))
-        cur.execute('UPDATE "group" SET enabled=1 WHERE id=?', (DEFAULT_GROUP_ID,))
-
-        # upsert each adlist
-        for url, desc in ADLISTS:
-            cur.execute("""
-                INSERT OR IGNORE INTO adlist(address, enabled, date_added, date_modified, comment)
-                VALUES (?, 1, strftime('%s','now'), strftime('%s','now'), ?)
-            """, (url, desc))
-            cur.execute("""
-                UPDATE adlist SET enabled=1, date_modified=strftime('%s','now'), comment=?
-                WHERE address=?
-            """, (desc, url))
-            # link to default group
-            cur.execute("""
-                INSERT OR IGNORE INTO adlist_by_group(adlist_id, group_id)
-                SELECT id, ? FROM adlist WHERE address=?
-            """, (DEFAULT_GROUP_ID, url))
-
-        conn.commit()
+        # find what actually needs writing; on re-runs this is usually nothing
+        urls = [url for url, _ in ADLISTS]
+        in_list = ",".join("?" * len(urls))
+        cur.execute(f"SELECT address, enabled, comment FROM adlist WHERE address IN ({in_list})", urls)
+        current = {addr: (enabled, comment) for addr, enabled, comment in cur.fetchall()}
+        cur.execute(f"""
+            SELECT a.address FROM adlist_by_group g JOIN adlist a ON a.id = g.adlist_id
+            WHERE g.group_id = ? AND a.address IN ({in_list})
+        """, (DEFAULT_GROUP_ID, *urls))
+        linked = {r[0] for r in cur.fetchall()}
+        cur.execute('SELECT enabled FROM "group" WHERE id=?', (DEFAULT_GROUP_ID,))
+        group = cur.fetchone()
+
+        pending = [(url, desc) for url, desc in ADLISTS if current.get(url) != (1, desc)]
+        if not pending and linked.issuperset(urls) and group and group[0] == 1:
+            print("All adlists already present and enabled; nothing to change.")
+            return False
+
+        # One script, one executescript() call: a single parse and a single
+        # Python->C crossing instead of one per statement.
+        sql = adlists_sql(pending, urls, int(time.time()))
+        conn.executescript(f"BEGIN IMMEDIATE;\n{sql}\nCOMMIT;\n")
+        return True
     finally:
         conn.close()
 
 def gravity_update(container: str):
     run(["docker", "exec", "-i", container, "pihole", "-g"])
 
-def list_current_adlists(container: str):
-    if container_has_sqlite3(container):
+def list_current_adlists(container: str, has_sqlite: bool):
+    if has_sqlite:
         out = run(
             ["docker", "exec", "-i", container, "bash", "-lc",
              f"sqlite3 -header -column {shlex.quote(DB_PATH_IN_CONTAINER)} \"SELECT id, enabled, address, comment FROM adlist ORDER BY id;\""],
             capture_output=True
         ).stdout
         print(out)
+    elif container_has_python3(container):
+        # Query in place (read-only) instead of copying the whole DB out
+        script = (
+            "import sqlite3, sys\n"
+            "conn = sqlite3.connect('file:' + sys.argv[1] + '?mode=ro', uri=True)\n"
+            "print('id | enabled | address | comment')\n"
+            "for r in conn.execute('SELECT id, enabled, address, comment FROM adlist ORDER BY id'):\n"
+            "    print(*r, sep=' | ')\n"
+        )
+        out = run(
+            ["docker", "exec", "-i", container, "python3", "-c", script, DB_PATH_IN_CONTAINER],
+            capture_output=True
+        ).stdout
+        print(out, end="")
     else:
         with tempfile.TemporaryDirectory() as td:
             local_db = os.path.join(td, "gravity.db")
@@ -144,19 +196,19 @@ def main():
     args = ap.parse_args()
 
     container = args.container or detect_container_name()
+    # probed once; each check is a docker exec round-trip
+    has_sqlite = container_has_sqlite3(container)
 
     if args.list:
-        list_current_adlists(container)
+        list_current_adlists(container, has_sqlite)
         sys.exit(0)
 
     print(f"Target container: {container}")
     print("Ensuring/adding adlists...")
 
-    if container_has_sqlite3(container):
+    if has_sqlite:
         # Fast path: run SQL inside the container
-        sql = ensure_default_group_sql()
-        for url, desc in ADLISTS:
-            sql += "\n" + upsert_adlist_sql(url, desc)
+        sql = adlists_sql(ADLISTS, [url for url, _ in ADLISTS], int(time.time()))
         if args.dry_run:
             print("--dry-run: would run SQL inside container:\n", sql)
         else:
@@ -169,8 +221,8 @@ def main():
             if args.dry_run:
                 print(f"--dry-run: would edit DB at {local_db} and copy back to {DB_PATH_IN_CONTAINER}")
             else:
-                edit_db_on_host(local_db)
-                run(["docker", "cp", local_db, f"{container}:{DB_PATH_IN_CONTAINER}"])
+                if edit_db_on_host(local_db):
+                    run(["docker", "cp", local_db, f"{container}:{DB_PATH_IN_CONTAINER}"])
 
     if args.dry_run:
         print("\n--dry-run specified: skipping gravity update. Use --list to inspect current state.")
@@ -179,7 +231,7 @@ def main():
     print("\nRebuilding gravity (pihole -g). This may take a minute...")
     gravity_update(container)
     print("Done.\nCurrent adlists:")
-    list_current_adlists(container)
+    list_current_adlists(container, has_sqlite)
 
 if __name__ == "__main__":
     main()
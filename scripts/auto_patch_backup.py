@@ -18,13 +18,22 @@ Notes:
 """
 
 import argparse
+import concurrent.futures
+import functools
 import json
 import os
+import shutil
 import subprocess
 import sys
 from pathlib import Path
 from typing import Dict, Iterable, List, Optional, Set, Tuple
 
+try:
+    # optional: faster parsing of large docker inspect output, straight from bytes
+    from orjson import loads as json_loads
+except ImportError:
+    json_loads = json.loads
+
 DEFAULT_EXPECT = ["pihole", "caddy", "homepage"]
 
 # Default prefixes we’re willing to archive if bind-mounted by a container.
@@ -60,26 +69,40 @@ def read_latest_backup() -> Optional[Path]:
     # fallback: pick most recent timestamp dir under ~/homelab-backups
     root = Path.home() / "homelab-backups"
     if root.exists():
-        candidates = sorted([d for d in root.iterdir() if d.is_dir()], key=lambda d: d.name)
-        return candidates[-1] if candidates else None
+        with os.scandir(root) as it:
+            candidates = sorted(e.name for e in it if e.is_dir(follow_symlinks=False))
+        return root / candidates[-1] if candidates else None
     return None
 
 def list_archives(dirpath: Path) -> Set[str]:
     if not dirpath.exists():
         return set()
-    return {p.name for p in dirpath.glob("*.tar.gz")}
+    with os.scandir(dirpath) as it:
+        return {e.name for e in it if e.name.endswith(".tar.gz")}
 
-def safe_archive_name_from_src(src: str) -> str:
-    # /a/b/c  ->  a__b__c.tar.gz
-    return src.lstrip("/").replace("/", "__") + ".tar.gz"
+_SLASH_TO_DUNDER = str.maketrans({"/": "__"})
 
-def docker_inspect(container: str) -> Optional[dict]:
+@functools.lru_cache(maxsize=None)
+def safe_archive_name_from_src(src: str) -> str:
+    # /a/b/c  ->  a__b__c.tar.gz  (same naming as homelab-backup.sh)
+    return src.lstrip("/").translate(_SLASH_TO_DUNDER) + ".tar.gz"
+
+def tar_compress_args() -> List[str]:
+    # Prefer pigz (parallel gzip) so archives stay .tar.gz but use every core.
+    # Resolve an absolute path because tar runs under sudo's PATH.
+    pigz = shutil.which("pigz")
+    if pigz:
+        return [f"--use-compress-program={pigz}"]
+    return ["-z"]
+
+def docker_inspect(containers: List[str]) -> List[dict]:
+    # One call for all names; missing containers are reported on stderr with
+    # a non-zero exit, but the ones that exist are still printed to stdout.
+    out = run(["docker", "inspect", *containers], check=False, text=False).stdout
     try:
-        out = run(["docker", "inspect", container]).stdout
-        data = json.loads(out)
-        return data[0] if data else None
-    except subprocess.CalledProcessError:
-        return None
+        return json_loads(out) if out.strip() else []
+    except ValueError:
+        return []
 
 def gather_container_mounts(containers: Iterable[str]) -> Dict[str, Tuple[str, List[dict], List[dict]]]:
     """
@@ -87,9 +110,12 @@ def gather_container_mounts(containers: Iterable[str]) -> Dict[str, Tuple[str, L
     where each mount dict is a standard docker inspect Mounts item.
     """
     info: Dict[str, Tuple[str, List[dict], List[dict]]] = {}
-    for name in containers:
-        data = docker_inspect(name)
-        if not data:
+    containers = list(containers)
+    if not containers:
+        return info
+    for data in docker_inspect(containers):
+        name = (data.get("Name") or "").lstrip("/")
+        if not name:
             continue
         image = data.get("Config", {}).get("Image") or data.get("Image", "")
         mounts = data.get("Mounts") or []
@@ -98,56 +124,79 @@ def gather_container_mounts(containers: Iterable[str]) -> Dict[str, Tuple[str, L
         info[name] = (image, vols, binds)
     return info
 
-def should_include_path(src: str, prefixes: List[str]) -> bool:
-    # include only if src is inside one of the allowed prefixes
-    for p in prefixes:
-        # Normalize to avoid trailing slash mismatches
-        p_norm = str(Path(p))
-        try:
-            src_norm = str(Path(src))
-        except Exception:
-            src_norm = src
-        if src_norm == p_norm or src_norm.startswith(p_norm + os.sep):
-            return True
-    return False
+def normalize_prefixes(prefixes: Iterable[str]) -> Tuple[str, ...]:
+    # Normalize once, with a trailing separator, so matching is a plain startswith
+    return tuple(os.path.normpath(p).rstrip(os.sep) + os.sep for p in prefixes)
+
+def should_include_path(src: str, prefixes: Tuple[str, ...]) -> bool:
+    # include only if src is (inside) one of the allowed prefixes;
+    # prefixes must come from normalize_prefixes()
+    return (os.path.normpath(src).rstrip(os.sep) + os.sep).startswith(prefixes)
+
+def archive_bind_mount(cname: str, src: str, archive_path: Path, compress: List[str]) -> bool:
+    """
+    Archive src into archive_path with sudo tar. Writes to a .tmp sibling and
+    renames it into place, so a failed run never leaves a partial .tar.gz.
+    """
+    tmp_path = archive_path.with_name(archive_path.name + ".tmp")
+    rel = src.lstrip("/")
+    try:
+        print(f"Archiving {src} (from {cname}) -> {archive_path}")
+        # Use sudo tar to handle root-owned paths
+        subprocess.run(
+            ["sudo", "tar", *compress, "-cf", str(tmp_path), "-C", "/", rel],
+            check=True,
+        )
+        # fix ownership so the user can read it
+        subprocess.run(["sudo", "chown", f"{os.getuid()}:{os.getgid()}", str(tmp_path)], check=True)
+        os.replace(tmp_path, archive_path)
+        return True
+    except (subprocess.CalledProcessError, OSError) as e:
+        print(f"ERROR: tar failed for {src}: {e}", file=sys.stderr)
+        subprocess.run(["sudo", "rm", "-f", str(tmp_path)], check=False)
+        return False
 
 def ensure_bind_archives(
     bind_mounts: List[Tuple[str, str, str]],
     bind_dir: Path,
+    existing: Set[str],
     dry_run: bool,
 ) -> List[str]:
     """
     For each (container, src, dst), ensure an archive exists in bind_dir.
-    Return a list of created archive filenames.
+    existing is the current set of archive names in bind_dir; archives that
+    get written are added to it. Return a list of created archive filenames.
     """
     created: List[str] = []
     bind_dir.mkdir(parents=True, exist_ok=True)
-    existing = list_archives(bind_dir)
+    compress = tar_compress_args()
 
+    jobs: List[Tuple[str, str, str]] = []  # (arc, container, src)
+    queued: Set[str] = set()
     for cname, src, dst in bind_mounts:
         arc = safe_archive_name_from_src(src)
-        if arc in existing:
+        if arc in existing or arc in queued:
             continue
-        # make it
-        archive_path = bind_dir / arc
+        queued.add(arc)
         if dry_run:
-            print(f"[dry-run] Would archive: {src} -> {archive_path}")
+            print(f"[dry-run] Would archive: {src} -> {bind_dir / arc}")
             created.append(arc)
             continue
-
-        # Use sudo tar to handle root-owned paths
-        rel = src.lstrip("/")
-        try:
-            print(f"Archiving {src} (from {cname}) -> {archive_path}")
-            subprocess.run(
-                ["sudo", "tar", "czf", str(archive_path), "-C", "/", rel],
-                check=True,
-            )
-            # fix ownership so the user can read it
-            subprocess.run(["sudo", "chown", f"{os.getuid()}:{os.getgid()}", str(archive_path)], check=True)
-            created.append(arc)
-        except subprocess.CalledProcessError as e:
-            print(f"ERROR: tar failed for {src}: {e}", file=sys.stderr)
+        jobs.append((arc, cname, src))
+
+    if not jobs:
+        return created
+
+    # Sources are independent directories, so overlap their tar/compress runs.
+    with concurrent.futures.ThreadPoolExecutor(max_workers=min(4, len(jobs))) as pool:
+        results = pool.map(
+            lambda job: archive_bind_mount(job[1], job[2], bind_dir / job[0], compress),
+            jobs,
+        )
+        for (arc, _, _), ok in zip(jobs, results):
+            if ok:
+                created.append(arc)
+                existing.add(arc)
     return created
 
 def rebuild_backup_image(make_script: Path) -> None:
@@ -191,6 +240,7 @@ def main():
     # Deduplicate while preserving order
     seen: Set[str] = set()
     allowed = [p for p in allowed if not (p in seen or seen.add(p))]
+    allowed_norm = normalize_prefixes(allowed)
 
     # Gather mounts
     info = gather_container_mounts(args.containers)
@@ -202,7 +252,7 @@ def main():
 
     # Always include Pi-hole key paths (even if not mounted through Docker)
     for must in ("/etc/pihole", "/etc/dnsmasq.d"):
-        if should_include_path(must, allowed) and Path(must).exists():
+        if should_include_path(must, allowed_norm) and Path(must).exists():
             candidates.append(("pihole", must, must))
 
     # Include binds reported by docker inspect
@@ -212,7 +262,7 @@ def main():
             dst = m.get("Destination") or m.get("Target") or ""
             if not src or not dst:
                 continue
-            if Path(src).exists() and should_include_path(src, allowed):
+            if Path(src).exists() and should_include_path(src, allowed_norm):
                 candidates.append((cname, src, dst))
 
     # De-duplicate by source path (keep first occurrence)
@@ -247,10 +297,10 @@ def main():
             print(f"  - {src}  (container: {cname})  -> bind-mounts/{arc}")
 
     # Create missing archives
-    created = ensure_bind_archives([(c,s,d) for c,s,d,_ in missing], backup_binds, args.dry_run)
+    created = ensure_bind_archives([(c,s,d) for c,s,d,_ in missing], backup_binds, existing, args.dry_run)
 
-    # Report AFTER
-    final = list_archives(backup_binds)
+    # Report AFTER (existing now includes anything written above)
+    final = existing
     print("\n== AFTER ==")
     print(f"bind-mount archives present: {len(final)}")
     for n in sorted(final):
@@ -1,10 +1,16 @@
 #!/usr/bin/env python3
-import argparse, json, os, shutil, subprocess, sys, tempfile
-from pathlib import Path
+import argparse, functools, json, subprocess, sys, tarfile
+
+try:
+    # optional: faster containers.json parsing, straight from bytes
+    from orjson import loads as json_loads
+except ImportError:
+    json_loads = json.loads
 
 def run(cmd, **kw):
     return subprocess.run(cmd, check=True, text=True, capture_output=True, **kw)
 
+@functools.lru_cache(maxsize=1)  # same answer for the whole run; avoid a second docker fork
 def list_backup_images(prefix="homelab-backup:"):
     try:
         out = run(["docker","images","--format","{{.Repository}}:{{.Tag}}"]).stdout.splitlines()
@@ -19,23 +25,83 @@ def autodetect_image():
     # Tags like YYYY-MM-DD_HHMMSS sort lexicographically; the last is newest
     return imgs[-1]
 
-def create_container(image):
-    return run(["docker","create",image]).stdout.strip()
+# Small files we actually read; everything else under /bundle is only checked for existence
+BUNDLE_FILES = (
+    "backup/manifests/containers.json",
+    "backup/manifests/running-images.txt",
+    "backup/manifests/containers.tsv",
+)
 
-def rm_container(cid):
-    subprocess.run(["docker","rm","-f",cid], check=False)
+def scan_bundle(tf, tree, files):
+    """
+    Walk a streaming tarfile, adding every path under bundle/ (relative to it,
+    parents included) to tree and reading BUNDLE_FILES into files.
+    """
+    for m in tf:
+        name = m.name.lstrip("/")
+        if name.startswith("./"):
+            name = name[2:]
+        name = name.rstrip("/")
+        if not name.startswith("bundle/") or name.rsplit("/", 1)[-1].startswith(".wh."):
+            continue
+        rel = name[len("bundle/"):]
+        parts = rel.split("/")
+        for i in range(1, len(parts) + 1):
+            tree.add("/".join(parts[:i]))
+        if rel in BUNDLE_FILES and m.isfile():
+            files[rel] = tf.extractfile(m).read()
 
-def docker_cp(cid, src, dst):
-    run(["docker","cp", f"{cid}:{src}", dst])
+def is_layer_member(m):
+    # legacy `docker save` layout: <id>/layer.tar; OCI layout: blobs/sha256/<digest>
+    return m.isfile() and (m.name.endswith("/layer.tar") or m.name.startswith("blobs/"))
 
-def read_lines(p: Path):
+def read_image_bundle(image):
+    """
+    Stream `docker image save` and scan each layer tarball for /bundle, keeping
+    only the path listing plus the small manifest files in memory. No container
+    is created and nothing is written to disk.
+    """
+    cmd = ["docker","image","save",image]
+    tree, files = set(), {}
+    proc = subprocess.Popen(cmd, stdout=subprocess.PIPE)
     try:
-        return p.read_text().splitlines()
-    except Exception:
-        return []
+        with tarfile.open(fileobj=proc.stdout, mode="r|") as outer:
+            for m in outer:
+                if not is_layer_member(m):
+                    continue
+                try:
+                    with tarfile.open(fileobj=outer.extractfile(m), mode="r|*") as layer:
+                        scan_bundle(layer, tree, files)
+                except tarfile.ReadError:
+                    continue  # config/manifest blob, not a layer
+    except tarfile.ReadError:
+        # docker printed nothing (e.g. unknown image); report its exit status instead
+        if proc.wait() == 0:
+            raise
+    finally:
+        proc.stdout.close()
+        rc = proc.wait()
+    if rc != 0:
+        raise subprocess.CalledProcessError(rc, cmd)
+    return tree, files
+
+def read_lines(files, rel):
+    data = files.get(rel)
+    return data.decode(errors="replace").splitlines() if data is not None else []
+
+def list_dir(tree, d):
+    prefix = d + "/"
+    return sorted(p[len(prefix):] for p in tree if p.startswith(prefix) and "/" not in p[len(prefix):])
 
-def list_tars(d: Path):
-    return sorted([p.name for p in d.glob("*.tar.gz")]) if d.exists() else []
+def list_tars(tree, d):
+    return [n for n in list_dir(tree, d) if n.endswith(".tar.gz")]
+
+_SLASH_TO_DUNDER = str.maketrans({"/": "__"})
+
+@functools.lru_cache(maxsize=None)
+def bind_name(src: str) -> str:
+    # /a/b/c  ->  a__b__c.tar.gz  (same naming as homelab-backup.sh)
+    return src.lstrip("/").translate(_SLASH_TO_DUNDER) + ".tar.gz"
 
 def pretty(b): 
     return "✅ yes" if b else "❌ no"
@@ -66,48 +132,44 @@ def main():
         )
         sys.exit(2)
 
-    tmp = Path(tempfile.mkdtemp(prefix="bundle-inspect-"))
-    bundle = tmp / "bundle"
-    cid = None
     try:
         print(f"Using image: {image}")
-        cid = create_container(image)
-        docker_cp(cid, "/bundle", str(tmp))
+        tree, files = read_image_bundle(image)
 
-        if not bundle.exists():
+        if not tree:
             sys.stderr.write("ERROR: /bundle not found inside the image. Is this the right image?\n")
             sys.exit(3)
 
-        backup = bundle / "backup"
-        vols = backup / "volumes"
-        binds = backup / "bind-mounts"
-        comps = backup / "compose-files"
-        man   = backup / "manifests"
-        certs = backup / "certs"
-        images_tar = backup / "images.tar"
-
-        containers_json = man / "containers.json"
-        running_images = read_lines(man / "running-images.txt")
-        containers_tsv = read_lines(man / "containers.tsv")
+        # paths relative to /bundle
+        vols  = "backup/volumes"
+        binds = "backup/bind-mounts"
+        comps = "backup/compose-files"
+        man   = "backup/manifests"
+        certs = "backup/certs"
+        images_tar = "backup/images.tar"
+
+        containers_json = f"{man}/containers.json"
+        running_images = read_lines(files, f"{man}/running-images.txt")
+        containers_tsv = read_lines(files, f"{man}/containers.tsv")
         try:
-            containers = json.loads(containers_json.read_text()) if containers_json.exists() else []
+            containers = json_loads(files[containers_json]) if containers_json in files else []
         except Exception as e:
-            sys.stderr.write(f"WARNING: could not parse {containers_json.name}: {e}\n")
+            sys.stderr.write(f"WARNING: could not parse containers.json: {e}\n")
             containers = []
 
-        vol_arch = set(list_tars(vols))
-        bind_arch = set(list_tars(binds))
-        comp_files = sorted([p.name for p in comps.glob("*")]) if comps.exists() else []
-        cert_present = (certs / "caddy-rootCA.crt").exists()
-        images_tar_present = images_tar.exists()
+        vol_arch = set(list_tars(tree, vols))
+        bind_arch = set(list_tars(tree, binds))
+        comp_files = list_dir(tree, comps)
+        cert_present = f"{certs}/caddy-rootCA.crt" in tree
+        images_tar_present = images_tar in tree
 
         print("\n== Top-level presence ==")
-        print(f"  volumes/:       {pretty(vols.exists())}  ({len(vol_arch)} archives)")
-        print(f"  bind-mounts/:   {pretty(binds.exists())}  ({len(bind_arch)} archives)")
-        print(f"  compose-files/: {pretty(comps.exists())}  ({len(comp_files)} files)")
-        print(f"  manifests/:     {pretty(man.exists())}")
+        print(f"  volumes/:       {pretty(vols in tree)}  ({len(vol_arch)} archives)")
+        print(f"  bind-mounts/:   {pretty(binds in tree)}  ({len(bind_arch)} archives)")
+        print(f"  compose-files/: {pretty(comps in tree)}  ({len(comp_files)} files)")
+        print(f"  manifests/:     {pretty(man in tree)}")
         print(f"  images.tar:     {pretty(images_tar_present)}")
-        print(f"  certs/:         {pretty(certs.exists())}   caddy-rootCA.crt: {pretty(cert_present)}")
+        print(f"  certs/:         {pretty(certs in tree)}   caddy-rootCA.crt: {pretty(cert_present)}")
 
         if comp_files:
             print("\ncompose-files/ (first 10):")
@@ -124,9 +186,6 @@ def main():
             for n in containers_tsv:
                 print("  -", n)
 
-        def bind_name(src: str) -> str:
-            return src.lstrip("/").replace("/", "__") + ".tar.gz"
-
         if containers:
             wanted = []
             for c in containers:
@@ -181,10 +240,10 @@ def main():
         print("\n== Done ==")
 
     except subprocess.CalledProcessError as e:
-        cmd_str = " ".join(e.args[0]) if isinstance(e.args, (list, tuple)) else str(e)
-        if "docker create" in cmd_str or "create" in cmd_str:
+        cmd_str = " ".join(e.cmd) if isinstance(e.cmd, (list, tuple)) else str(e.cmd)
+        if cmd_str.startswith("docker image save"):
             imgs = list_backup_images()
-            sys.stderr.write(f"ERROR: Could not create container from image '{image}'.\n")
+            sys.stderr.write(f"ERROR: Could not read image '{image}'.\n")
             if imgs:
                 sys.stderr.write("Available homelab-backup images:\n")
                 for i in imgs:
@@ -202,12 +261,6 @@ def main():
         else:
             sys.stderr.write(f"ERROR: Command failed: {e}\n")
             sys.exit(1)
-    finally:
-        try:
-            if 'cid' in locals() and cid:
-                rm_container(cid)
-        finally:
-            shutil.rmtree(str(tmp), ignore_errors=True)
 
 if __name__ == "__main__":
     main()